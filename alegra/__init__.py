@@ -1,3 +1,10 @@
+def __getattr__(name):
+    # Resolved on first access: versioneer inspects the git tree, which is
+    # wasted work for callers that never read the version.
+    if name == "__version__":
+        from . import _version
 
-from . import _version
-__version__ = _version.get_versions()['version']
+        version = _version.get_versions()["version"]
+        globals()["__version__"] = version
+        return version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,69 @@
+import threading
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+
+class CacheEntry:
+    __slots__ = ("etag", "last_modified", "content")
+
+    def __init__(self, etag, last_modified, content: bytes):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content = content
+
+    def conditional_headers(self):
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """LRU of raw GET response bodies, revalidated with ETag/Last-Modified.
+
+    Bodies are kept as bytes and decoded on every hit, so callers never share
+    (and can never mutate) the cached data.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint: str, params=None):
+        if not params:
+            return endpoint
+        if isinstance(params, (str, bytes)):
+            query = params if isinstance(params, str) else params.decode()
+        elif hasattr(params, "items"):
+            query = urlencode(sorted(params.items()), doseq=True)
+        else:
+            # Sequences of pairs keep their order, as they do on the wire.
+            query = urlencode(list(params), doseq=True)
+        return endpoint + "?" + query
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def store(self, key, headers, content: bytes):
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        with self._lock:
+            if not etag and not last_modified:
+                self._entries.pop(key, None)
+                return
+            self._entries[key] = CacheEntry(etag, last_modified, content)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
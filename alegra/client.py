@@ -1,54 +1,166 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+
 import httpx
+import orjson
 import requests
 
+from alegra.cache import ResponseCache
 from alegra.config import ApiConfig
+from alegra.exceptions import (
+    AlegraAuthenticationError,
+    AlegraHttpError,
+    AlegraNotFoundError,
+    AlegraPermissionError,
+    AlegraRateLimitError,
+    AlegraResponseParseError,
+    AlegraServerError,
+    AlegraValidationError,
+)
 from alegra.models.company import Company
 from alegra.models.dian import DianResource
 from alegra.models.invoice import FileResponse, Invoice, InvoiceResponse
 from alegra.models.note import CreditNote, DebitNote, NoteResponse
 from alegra.models.payroll import Payroll
 from alegra.models.test_set import TestSet
+from alegra.resources.base import ApiResource, AsyncApiResource
 from alegra.resources.factory import ResourceFactory
+from alegra.responses import RawResponse
+
+_STATUS_ERRORS = {
+    401: (AlegraAuthenticationError, "Authentication failed, check the API key"),
+    403: (AlegraPermissionError, "Permission denied"),
+    404: (AlegraNotFoundError, "Resource not found"),
+    422: (AlegraValidationError, "Validation failed"),
+    429: (AlegraRateLimitError, "Rate limit exceeded"),
+}
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+_NOT_MODIFIED = object()
+
+_STREAM_CHUNK_SIZE = 64 * 1024
 
 
-class ApiClient:
-    def __init__(self, config: ApiConfig, async_mode=False):
+class BaseApiClient:
+    resource_class = None
+
+    def __init__(self, config: ApiConfig):
         self.config = config
         self.base_url = self.config.get_base_url()
-        self.async_mode = async_mode
+        self._headers = {
+            "Authorization": f"Bearer {self.config.api_key}",
+            "Accept": "application/json",
+        }
+        self._cache = None
+        if self.config.cache_size > 0:
+            self._cache = ResponseCache(self.config.cache_size)
         self._initialize_resources()
 
-    async def _async_request(self, method, endpoint, **kwargs):
-        url = f"{self.base_url}/{endpoint}"
-        async with httpx.AsyncClient(
-            headers={"Authorization": f"Bearer {self.config.api_key}"}, timeout=30.0
-        ) as client:
-            response = await client.request(method, url, **kwargs)
-            return response.json()
-
-    def _sync_request(self, method, endpoint, **kwargs):
-        url = f"{self.base_url}/{endpoint}"
-        with requests.Session() as session:
-            session.headers.update(
-                {
-                    "Authorization": f"Bearer {self.config.api_key}",
-                    "Accept": "application/json",
-                }
-            )
-            response = session.request(method, url, **kwargs)
-            return response.json()
-
     def _request(self, method, endpoint, **kwargs):
-        if self.async_mode:
-            return self._async_request(method, endpoint, **kwargs)
-        else:
-            return self._sync_request(method, endpoint, **kwargs)
+        raise NotImplementedError
+
+    def _conditional_request(self, method, endpoint, kwargs):
+        if method != "GET" or self._cache is None:
+            return None, None
+        cache_key = self._cache.key(endpoint, kwargs.get("params"))
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            kwargs["headers"] = {
+                **kwargs.get("headers", {}),
+                **cached.conditional_headers(),
+            }
+        return cache_key, cached
+
+    def _handle_cached_response(self, response, cache_key, cached, allow_404):
+        payload = self._handle_response(response, allow_404)
+        if payload is _NOT_MODIFIED:
+            if cached is None:
+                raise self._not_modified_error(response)
+            return orjson.loads(cached.content)
+        if cache_key is None or payload is None or isinstance(payload, RawResponse):
+            return payload
+        self._cache.store(cache_key, response.headers, response.content)
+        return payload
+
+    @staticmethod
+    def _not_modified_error(response):
+        return AlegraHttpError(
+            "Not modified, but no cached response is available",
+            response.status_code,
+            str(response.url),
+            response.content,
+        )
+
+    @staticmethod
+    def _streams_json(response):
+        status_code = response.status_code
+        return (
+            200 <= status_code < 300
+            and status_code != 204
+            and response.headers.get("content-length") != "0"
+            and "json" in response.headers.get("content-type", "")
+        )
+
+    def _unstreamed_response(self, response):
+        # Error, empty and non-JSON bodies are handled exactly as _request
+        # handles them, so list_stream() fails the way list() does.
+        payload = self._handle_response(response)
+        if payload is _NOT_MODIFIED:
+            raise self._not_modified_error(response)
+        return payload
+
+    @staticmethod
+    def _encode_body(kwargs, body_arg):
+        # Resources pass pre-serialized JSON as `content`, which is what httpx
+        # expects; requests takes raw bodies as `data`.
+        if "content" in kwargs:
+            if body_arg != "content":
+                kwargs[body_arg] = kwargs.pop("content")
+            if "headers" in kwargs:
+                kwargs["headers"] = {**kwargs["headers"], **_JSON_HEADERS}
+            else:
+                kwargs["headers"] = _JSON_HEADERS
+        return kwargs
+
+    @staticmethod
+    def _handle_response(response, allow_404=False):
+        status_code = response.status_code
+        if 200 <= status_code < 300:
+            if (
+                status_code == 204
+                or not response.content
+                or "json" not in response.headers.get("content-type", "")
+            ):
+                return RawResponse(status_code, response.content)
+            try:
+                return orjson.loads(response.content)
+            except orjson.JSONDecodeError as e:
+                raise AlegraResponseParseError(
+                    f"Invalid JSON in response: {e}", response.content
+                ) from e
+        if status_code == 304:
+            return _NOT_MODIFIED
+        if status_code == 404 and allow_404:
+            return None
+
+        error = _STATUS_ERRORS.get(status_code)
+        if error is None:
+            if status_code >= 500:
+                error = (AlegraServerError, "Server error")
+            else:
+                error = (AlegraHttpError, "Request failed")
+        error_class, message = error
+        raise error_class(message, status_code, str(response.url), response.content)
+
+    def _resource(self, endpoint, actions_config):
+        return ResourceFactory(
+            self, endpoint, self._request, actions_config, self.resource_class
+        )
 
     def _initialize_resources(self):
-        self.company = ResourceFactory(
-            self,
+        self.company = self._resource(
             "company",
-            self._request,
             {
                 "get": {
                     "model": Company,
@@ -62,10 +174,8 @@ class ApiClient:
                 },
             },
         )
-        self.companies = ResourceFactory(
-            self,
+        self.companies = self._resource(
             "companies",
-            self._request,
             {
                 "create": {
                     "model": Company,
@@ -89,10 +199,8 @@ class ApiClient:
                 },
             },
         )
-        self.payrolls = ResourceFactory(
-            self,
+        self.payrolls = self._resource(
             "payrolls",
-            self._request,
             {
                 "create": {"model": Payroll, "response_key": "payroll"},
                 "get": {"model": Payroll, "response_key": "payroll"},
@@ -102,25 +210,19 @@ class ApiClient:
                 "perform__cancel": {"model": Payroll, "response_key": "payroll"},
             },
         )
-        self.dian = ResourceFactory(
-            self,
+        self.dian = self._resource(
             "dian",
-            self._request,
             {"list": {"model": DianResource, "response_key": "dian"}},
         )
-        self.test_sets = ResourceFactory(
-            self,
+        self.test_sets = self._resource(
             "test-sets",
-            self._request,
             {
                 "create": {"model": TestSet, "response_key": "test_set"},
                 "get": {"model": TestSet, "response_key": "test_set"},
             },
         )
-        self.invoices = ResourceFactory(
-            self,
+        self.invoices = self._resource(
             "invoices",
-            self._request,
             {
                 "create": {
                     "model": Invoice,
@@ -145,10 +247,8 @@ class ApiClient:
                 },
             },
         )
-        self.credit_notes = ResourceFactory(
-            self,
+        self.credit_notes = self._resource(
             "credit-notes",
-            self._request,
             {
                 "create": {
                     "model": CreditNote,
@@ -173,10 +273,8 @@ class ApiClient:
                 },
             },
         )
-        self.debit_notes = ResourceFactory(
-            self,
+        self.debit_notes = self._resource(
             "debit-notes",
-            self._request,
             {
                 "create": {
                     "model": DebitNote,
@@ -201,3 +299,97 @@ class ApiClient:
                 },
             },
         )
+
+
+class ApiClient(BaseApiClient):
+    resource_class = ApiResource
+
+    def __init__(self, config: ApiConfig):
+        super().__init__(config)
+        self._base_prefix = self.base_url + "/"
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+
+    def close(self):
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _request(self, method, endpoint, **kwargs):
+        allow_404 = kwargs.pop("allow_404", False)
+        kwargs = self._encode_body(kwargs, "data")
+        cache_key, cached = self._conditional_request(method, endpoint, kwargs)
+        response = self._session.request(method, self._base_prefix + endpoint, **kwargs)
+        return self._handle_cached_response(response, cache_key, cached, allow_404)
+
+    @contextmanager
+    def _stream_request(self, method, endpoint, **kwargs):
+        response = self._session.request(
+            method, self._base_prefix + endpoint, stream=True, **kwargs
+        )
+        try:
+            if self._streams_json(response):
+                yield response.iter_content(chunk_size=_STREAM_CHUNK_SIZE)
+            else:
+                yield self._unstreamed_response(response)
+        finally:
+            response.close()
+
+
+class AsyncApiClient(BaseApiClient):
+    resource_class = AsyncApiResource
+
+    def __init__(self, config: ApiConfig):
+        super().__init__(config)
+        self._semaphore = None
+        self._async_client = httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=True,
+            headers=self._headers,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
+
+    async def aclose(self):
+        await self._async_client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def _request(self, method, endpoint, **kwargs):
+        allow_404 = kwargs.pop("allow_404", False)
+        kwargs = self._encode_body(kwargs, "content")
+        cache_key, cached = self._conditional_request(method, endpoint, kwargs)
+        async with self._get_semaphore():
+            response = await self._async_client.request(method, endpoint, **kwargs)
+        return self._handle_cached_response(response, cache_key, cached, allow_404)
+
+    @asynccontextmanager
+    async def _stream_request(self, method, endpoint, **kwargs):
+        request = self._async_client.build_request(method, endpoint, **kwargs)
+        # The concurrency slot is held only until the headers arrive. The body
+        # is read while the caller iterates, possibly issuing requests of its
+        # own, and the open connection is already bounded by the httpx pool.
+        async with self._get_semaphore():
+            response = await self._async_client.send(request, stream=True)
+        try:
+            if self._streams_json(response):
+                yield response.aiter_bytes(_STREAM_CHUNK_SIZE)
+            else:
+                await response.aread()
+                yield self._unstreamed_response(response)
+        finally:
+            await response.aclose()
+
+    def _get_semaphore(self):
+        if self._semaphore is None:
+            # Created lazily so it binds to the running event loop.
+            self._semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        return self._semaphore
@@ -1,14 +1,32 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+_BASE_URLS = {
+    'sandbox': 'https://sandbox-api.alegra.com/e-provider/col/v1',
+    'production': 'https://api.alegra.com/e-provider/col/v1',
+}
 
 
 class ApiConfig(BaseModel):
+    model_config = ConfigDict(frozen=True, str_strip_whitespace=True)
+
     api_key: str
     environment: str
+    max_concurrency: int = Field(64, gt=0)
+    cache_size: int = Field(0, ge=0)
 
-    def get_base_url(self):
-        if self.environment == 'sandbox':
-            return 'https://sandbox-api.alegra.com/e-provider/col/v1'
-        elif self.environment == 'production':
-            return 'https://api.alegra.com/e-provider/col/v1'
-        else:
+    @field_validator('api_key')
+    @classmethod
+    def validate_api_key(cls, v):
+        if not v:
+            raise ValueError('API key must not be empty.')
+        return v
+
+    @field_validator('environment')
+    @classmethod
+    def validate_environment(cls, v):
+        if v not in _BASE_URLS:
             raise ValueError("Invalid environment. Choose 'sandbox' or 'production'.")
+        return v
+
+    def get_base_url(self):
+        return _BASE_URLS[self.environment]
@@ -0,0 +1,82 @@
+import orjson
+
+
+class AlegraApiError(ValueError):
+    # ValueError keeps compatibility with callers written against the
+    # ValueError the resources used to raise for error payloads.
+    __slots__ = ()
+
+
+class AlegraResponseParseError(AlegraApiError):
+    __slots__ = ("message", "response_bytes", "_response_text")
+
+    def __init__(self, message, response_bytes=None):
+        self.message = message
+        self.response_bytes = response_bytes
+        self._response_text = None
+        super().__init__(message)
+
+    @property
+    def response_text(self):
+        if self._response_text is None and self.response_bytes is not None:
+            self._response_text = self.response_bytes.decode("utf-8", errors="replace")
+        return self._response_text
+
+
+class AlegraHttpError(AlegraApiError):
+    __slots__ = (
+        "message",
+        "status_code",
+        "url",
+        "response_bytes",
+        "_response_text",
+        "response",
+    )
+
+    def __init__(self, message, status_code, url, response_bytes):
+        self.message = message
+        self.status_code = status_code
+        self.url = url
+        self.response_bytes = response_bytes
+        self._response_text = None
+        try:
+            self.response = orjson.loads(response_bytes)
+        except orjson.JSONDecodeError:
+            self.response = None
+
+        detail = None
+        if isinstance(self.response, dict):
+            detail = self.response.get("message") or self.response.get("errors")
+        if detail:
+            message = f"{message}: {detail}"
+        super().__init__(f"[{status_code}] {message}")
+
+    @property
+    def response_text(self):
+        if self._response_text is None:
+            self._response_text = self.response_bytes.decode("utf-8", errors="replace")
+        return self._response_text
+
+
+class AlegraAuthenticationError(AlegraHttpError):
+    __slots__ = ()
+
+
+class AlegraPermissionError(AlegraHttpError):
+    __slots__ = ()
+
+
+class AlegraNotFoundError(AlegraHttpError):
+    __slots__ = ()
+
+
+class AlegraValidationError(AlegraHttpError):
+    __slots__ = ()
+
+
+class AlegraRateLimitError(AlegraHttpError):
+    __slots__ = ()
+
+
+class AlegraServerError(AlegraHttpError):
+    __slots__ = ()
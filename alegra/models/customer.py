@@ -3,7 +3,6 @@ from typing import Optional
 from pydantic import BaseModel, EmailStr
 
 from alegra.models.address import Address
-from alegra.models.phone_number import PhoneNumber
 
 
 class Customer(BaseModel):
@@ -11,7 +10,7 @@ class Customer(BaseModel):
     organizationType: int
     identificationType: str
     identificationNumber: Optional[str]
-    dv: Optional[str]
+    dv: Optional[str] = None
     email: Optional[EmailStr] = ""
     address: Optional[Address] = None
     phone: str = ""
@@ -1,9 +1,105 @@
-from typing import Callable, Dict
+from typing import Callable, Dict, List
 
-from pydantic import BaseModel
+import orjson
+from pydantic import BaseModel, TypeAdapter
 
+from alegra.exceptions import AlegraResponseParseError
+from alegra.responses import RawResponse
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+class ActionSpec:
+    __slots__ = (
+        "model",
+        "response_model",
+        "response_key",
+        "endpoint_suffix",
+        "list_adapter",
+    )
+
+    def __init__(self, action: str, config: Dict[str, str]):
+        self.model = config["model"]
+        self.response_model = config.get("response_model", self.model)
+        self.response_key = config.get("response_key")
+        self.endpoint_suffix = config.get("endpoint_suffix")
+        self.list_adapter = None
+        if action == "list":
+            self.list_adapter = TypeAdapter(List[self.model])
+
+
+class _ListStreamParser:
+    """Incrementally parses `{response_key: [...]}` into validated models.
+
+    Raw chunks are buffered only until the top-level response key shows up,
+    so a body without it fails like `list()` does instead of yielding nothing.
+    """
+
+    __slots__ = ("spec", "_items", "_parser", "_events", "_key_parser", "_buffer")
+
+    def __init__(self, spec: ActionSpec):
+        self.spec = spec
+        self._items = ijson.sendable_list()
+        self._parser = ijson.items_coro(
+            self._items, spec.response_key + ".item", use_float=True
+        )
+        self._events = ijson.sendable_list()
+        self._key_parser = ijson.parse_coro(self._events)
+        self._buffer = []
+
+    def feed(self, chunk: bytes):
+        try:
+            if self._buffer is not None:
+                self._buffer.append(chunk)
+                self._key_parser.send(chunk)
+                key = self.spec.response_key
+                if any(
+                    prefix == "" and event == "map_key" and value == key
+                    for prefix, event, value in self._events
+                ):
+                    self._buffer = None
+                    self._key_parser = None
+                del self._events[:]
+            self._parser.send(chunk)
+        except ijson.JSONError as e:
+            raise self._parse_error(e) from e
+        return self._drain()
+
+    def close(self):
+        try:
+            self._parser.close()
+        except ijson.JSONError as e:
+            raise self._parse_error(e) from e
+        if self._buffer is not None:
+            BaseApiResource._extract(
+                orjson.loads(b"".join(self._buffer)), self.spec.response_key
+            )
+        return self._drain()
+
+    def _parse_error(self, error):
+        body = None if self._buffer is None else b"".join(self._buffer)
+        return AlegraResponseParseError(f"Invalid JSON in response: {error}", body)
+
+    def _drain(self):
+        model = self.spec.model
+        parsed = [model.model_validate(item) for item in self._items]
+        del self._items[:]
+        return parsed
+
+
+class BaseApiResource:
+    __slots__ = (
+        "client",
+        "endpoint",
+        "_endpoint_prefix",
+        "request_method",
+        "actions_config",
+        "actions",
+    )
 
-class ApiResource:
     def __init__(
         self,
         client,
@@ -13,132 +109,215 @@ class ApiResource:
     ):
         self.client = client
         self.endpoint = endpoint
+        self._endpoint_prefix = endpoint + "/"
         self.request_method = request_method
         self.actions_config = actions_config
+        self.actions = {
+            action: ActionSpec(action, config)
+            for action, config in actions_config.items()
+        }
 
-    def _is_action_allowed(self, action: str):
-        return action in self.actions_config
-
-    def _parse_response(self, response, action: str):
-        response_key = self.actions_config[action].get("response_key")
-        if response_key:
-            if response_key not in response:
-                if response.get("message"):
-                    raise ValueError(response.get("message"))
-                if response.get("errors"):
-                    raise ValueError(response.get("errors"))
-                raise ValueError(f"Response key '{response_key}' not found in response")
-            response_data = response.get(response_key, response)
-        else:
-            response_data = response
-        model = self.actions_config[action]["response_model"]
-        return model.model_validate(response_data)
+    def _get_action(self, action: str):
+        spec = self.actions.get(action)
+        if spec is None:
+            raise NotImplementedError(
+                f"The action '{action}' is not allowed for {self.endpoint}"
+            )
+        return spec
+
+    @staticmethod
+    def _extract(response, response_key: str):
+        if isinstance(response, RawResponse):
+            body = "a non-JSON body" if response.content else "an empty body"
+            raise AlegraResponseParseError(
+                f"Expected a JSON response with key '{response_key}', got {body}",
+                response.content,
+            )
+        try:
+            return response[response_key]
+        except (KeyError, TypeError):
+            if not isinstance(response, dict):
+                raise AlegraResponseParseError(
+                    f"Expected a JSON object with key '{response_key}' in response"
+                )
+            if response.get("message"):
+                raise AlegraResponseParseError(response.get("message"))
+            if response.get("errors"):
+                raise AlegraResponseParseError(response.get("errors"))
+            raise AlegraResponseParseError(
+                f"Response key '{response_key}' not found in response"
+            )
+
+    def _parse_response(self, response, spec: ActionSpec):
+        if spec.response_key:
+            response = self._extract(response, spec.response_key)
+        return spec.response_model.model_validate(response)
 
     def _prepare_data(self, data: BaseModel):
         if data is None:
-            return {}
-        data = data.model_dump()
-        if "customer" in data:
-            customer_data = data["customer"]
-            if customer_data["dv"] is None:
-                del customer_data["dv"]
-
-        if "resolution" in data:
-            resolution_data = data["resolution"]
-            if resolution_data.get("prefix") is None:
-                del resolution_data["prefix"]
+            return b"{}"
+        return data.model_dump_json(exclude_none=True).encode()
 
-        return {k: v for k, v in data.items() if v is not None}
+    def _stream_parser(self, spec: ActionSpec):
+        if ijson is None:
+            raise ImportError(
+                "list_stream() requires ijson, install alegra-e-provider[stream]"
+            )
+        return _ListStreamParser(spec)
 
-    def get(self, resource_id: str):
-        action = "get"
-        if not self._is_action_allowed(action):
+    def _subaction_request(
+        self, resource_id: str, subaction: str, data: BaseModel = None
+    ):
+        spec = self.actions.get(f"perform__{subaction}")
+        if spec is None:
             raise NotImplementedError(
-                f"The action 'get' is not allowed for {self.endpoint}"
+                f"The subaction '{subaction}' is not allowed for {self.endpoint}"
             )
-        endpoint = f"{self.endpoint}/{resource_id}"
-        response = self.request_method("GET", endpoint)
-        return self._parse_response(response, action)
+        endpoint_suffix = spec.endpoint_suffix or subaction
+        endpoint = self._endpoint_prefix + resource_id + "/" + endpoint_suffix
 
-    def create(self, data: BaseModel):
-        if self.client.async_mode:
-            return self.create_async(data)
-        else:
-            action = "create"
-            if not self._is_action_allowed(action):
-                raise NotImplementedError(
-                    f"The action 'create' is not allowed for {self.endpoint}"
-                )
-            response = self.request_method(
-                "POST", self.endpoint, json=self._prepare_data(data)
-            )
-            return self._parse_response(response, action)
+        kwargs = {}
+        if data:
+            kwargs["content"] = self._prepare_data(data)
+        return spec, self._request_method_for_subaction(subaction), endpoint, kwargs
 
-    async def create_async(self, data: BaseModel):
-        action = "create"
-        if not self._is_action_allowed(action):
-            raise NotImplementedError(
-                f"The action 'create' is not allowed for {self.endpoint}"
-            )
-        response = await self.request_method(
-            "POST", self.endpoint, json=self._prepare_data(data)
+    @staticmethod
+    def _request_method_for_subaction(subaction: str):
+        return "POST" if subaction in ["replace", "cancel"] else "GET"
+
+
+class ApiResource(BaseApiResource):
+    __slots__ = ()
+
+    def get(self, resource_id: str):
+        spec = self._get_action("get")
+        response = self.request_method("GET", self._endpoint_prefix + resource_id)
+        return self._parse_response(response, spec)
+
+    def get_or_none(self, resource_id: str):
+        spec = self._get_action("get")
+        response = self.request_method(
+            "GET", self._endpoint_prefix + resource_id, allow_404=True
         )
-        return self._parse_response(response, action)
+        if response is None:
+            return None
+        return self._parse_response(response, spec)
+
+    def create(self, data: BaseModel):
+        spec = self._get_action("create")
+        response = self.request_method(
+            "POST", self.endpoint, content=self._prepare_data(data)
+        )
+        return self._parse_response(response, spec)
 
     def update(self, resource_id: str, data: BaseModel):
-        action = "update"
-        if not self._is_action_allowed(action):
-            raise NotImplementedError(
-                f"The action 'update' is not allowed for {self.endpoint}"
-            )
-        endpoint = f"{self.endpoint}/{resource_id}"
-        response = self.request_method("PATCH", endpoint, json=self._prepare_data(data))
-        return self._parse_response(response, action)
+        spec = self._get_action("update")
+        response = self.request_method(
+            "PATCH",
+            self._endpoint_prefix + resource_id,
+            content=self._prepare_data(data),
+        )
+        return self._parse_response(response, spec)
 
     def delete(self, resource_id: str):
-        action = "delete"
-        if not self._is_action_allowed(action):
-            raise NotImplementedError(
-                f"The action 'delete' is not allowed for {self.endpoint}"
-            )
-        endpoint = f"{self.endpoint}/{resource_id}"
-        response = self.request_method("DELETE", endpoint)
-        return response.status_code == 204
+        self._get_action("delete")
+        response = self.request_method("DELETE", self._endpoint_prefix + resource_id)
+        return isinstance(response, RawResponse) and response.status_code == 204
 
     def list(self, params=None):
-        action = "list"
-        if not self._is_action_allowed(action):
-            raise NotImplementedError(
-                f"The action 'list' is not allowed for {self.endpoint}"
-            )
+        spec = self._get_action("list")
         response = self.request_method("GET", self.endpoint, params=params)
-        return [
-            self.actions_config[action]["model"].model_validate(item)
-            for item in response.get(
-                self.actions_config[action].get("response_key", [])
-            )
-        ]
+        items = self._extract(response, spec.response_key)
+        return spec.list_adapter.validate_python(items)
+
+    def list_stream(self, params=None):
+        spec = self._get_action("list")
+        parser = self._stream_parser(spec)
+        with self.client._stream_request("GET", self.endpoint, params=params) as chunks:
+            if isinstance(chunks, RawResponse):
+                self._extract(chunks, spec.response_key)
+            for chunk in chunks:
+                # An empty chunk would signal end of input to the parser.
+                if chunk:
+                    yield from parser.feed(chunk)
+        yield from parser.close()
 
     def perform_subaction(
         self, resource_id: str, subaction: str, data: BaseModel = None
     ):
-        action = f"perform__{subaction}"
-        if not self._is_action_allowed(action):
-            raise NotImplementedError(
-                f"The subaction '{subaction}' is not allowed for {self.endpoint}"
-            )
-        endpoint_suffix = self.actions_config[action].get("endpoint_suffix", subaction)
-        endpoint = f"{self.endpoint}/{resource_id}/{endpoint_suffix}"
+        spec, method, endpoint, kwargs = self._subaction_request(
+            resource_id, subaction, data
+        )
+        response = self.request_method(method, endpoint, **kwargs)
+        return self._parse_response(response, spec)
 
-        kwargs = {}
-        if data:
-            kwargs["json"] = self._prepare_data(data)
 
-        response = self.request_method(
-            self._request_method_for_subaction(subaction), endpoint, **kwargs
+class AsyncApiResource(BaseApiResource):
+    __slots__ = ()
+
+    async def get(self, resource_id: str):
+        spec = self._get_action("get")
+        response = await self.request_method("GET", self._endpoint_prefix + resource_id)
+        return self._parse_response(response, spec)
+
+    async def get_or_none(self, resource_id: str):
+        spec = self._get_action("get")
+        response = await self.request_method(
+            "GET", self._endpoint_prefix + resource_id, allow_404=True
         )
-        return self._parse_response(response, action)
+        if response is None:
+            return None
+        return self._parse_response(response, spec)
 
-    @staticmethod
-    def _request_method_for_subaction(subaction: str):
-        return "POST" if subaction in ["replace", "cancel"] else "GET"
+    async def create(self, data: BaseModel):
+        spec = self._get_action("create")
+        response = await self.request_method(
+            "POST", self.endpoint, content=self._prepare_data(data)
+        )
+        return self._parse_response(response, spec)
+
+    async def update(self, resource_id: str, data: BaseModel):
+        spec = self._get_action("update")
+        response = await self.request_method(
+            "PATCH",
+            self._endpoint_prefix + resource_id,
+            content=self._prepare_data(data),
+        )
+        return self._parse_response(response, spec)
+
+    async def delete(self, resource_id: str):
+        self._get_action("delete")
+        response = await self.request_method(
+            "DELETE", self._endpoint_prefix + resource_id
+        )
+        return isinstance(response, RawResponse) and response.status_code == 204
+
+    async def list(self, params=None):
+        spec = self._get_action("list")
+        response = await self.request_method("GET", self.endpoint, params=params)
+        items = self._extract(response, spec.response_key)
+        return spec.list_adapter.validate_python(items)
+
+    async def list_stream(self, params=None):
+        spec = self._get_action("list")
+        parser = self._stream_parser(spec)
+        async with self.client._stream_request(
+            "GET", self.endpoint, params=params
+        ) as chunks:
+            if isinstance(chunks, RawResponse):
+                self._extract(chunks, spec.response_key)
+            async for chunk in chunks:
+                if chunk:
+                    for item in parser.feed(chunk):
+                        yield item
+        for item in parser.close():
+            yield item
+
+    async def perform_subaction(
+        self, resource_id: str, subaction: str, data: BaseModel = None
+    ):
+        spec, method, endpoint, kwargs = self._subaction_request(
+            resource_id, subaction, data
+        )
+        response = await self.request_method(method, endpoint, **kwargs)
+        return self._parse_response(response, spec)
@@ -1,23 +1,29 @@
-from typing import Callable, Dict
+from typing import Callable, Dict, Type
 
 from pydantic import BaseModel
 
-from .base import ApiResource
+from .base import ApiResource, BaseApiResource
 
 
 class ResourceFactory:
+    __slots__ = ("resource",)
+
     def __init__(
         self,
         client,
         endpoint: str,
         request_method: Callable,
         actions_config: Dict[str, Dict[str, str]],
+        resource_class: Type[BaseApiResource] = ApiResource,
     ):
-        self.resource = ApiResource(client, endpoint, request_method, actions_config)
+        self.resource = resource_class(client, endpoint, request_method, actions_config)
 
     def get(self, resource_id):
         return self.resource.get(resource_id)
 
+    def get_or_none(self, resource_id):
+        return self.resource.get_or_none(resource_id)
+
     def create(self, data):
         return self.resource.create(data)
 
@@ -30,6 +36,9 @@ class ResourceFactory:
     def list(self, params=None):
         return self.resource.list(params)
 
+    def list_stream(self, params=None):
+        return self.resource.list_stream(params)
+
     def perform_subaction(
         self, resource_id: str, subaction: str, data: BaseModel = None
     ):
@@ -0,0 +1,8 @@
+class RawResponse:
+    """A 2xx response whose body is empty or not JSON."""
+
+    __slots__ = ("status_code", "content")
+
+    def __init__(self, status_code: int, content: bytes):
+        self.status_code = status_code
+        self.content = content
@@ -0,0 +1,300 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+import vcr
+from vcr.unittest import VCRTestCase
+
+from alegra.client import ApiClient, AsyncApiClient
+from alegra.config import ApiConfig
+from alegra.exceptions import (
+    AlegraHttpError,
+    AlegraNotFoundError,
+    AlegraResponseParseError,
+)
+from alegra.models.dian import DianResource
+
+
+class TestApiClientList(VCRTestCase):
+    def setUp(self):
+        self.config = ApiConfig(api_key="REDACTED", environment="sandbox")
+        self.client = ApiClient(self.config)
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_list_dian_resources(self):
+        resources = self.client.dian.list()
+
+        self.assertEqual(len(resources), 2)
+        self.assertIsInstance(resources[0], DianResource)
+        self.assertEqual(resources[1].name, "Producción")
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources_with_params.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_list_dian_resources_with_params(self):
+        client = ApiClient(
+            ApiConfig(api_key="REDACTED", environment="sandbox", cache_size=8)
+        )
+        resources = client.dian.list(params=[("start", 0), ("limit", 30)])
+
+        self.assertEqual([resource.id for resource in resources], ["1", "2"])
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_list_stream_dian_resources(self):
+        resources = list(self.client.dian.list_stream())
+
+        self.assertEqual([resource.id for resource in resources], ["1", "2"])
+        self.assertIsInstance(resources[0], DianResource)
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources_missing_key.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_list_stream_missing_response_key(self):
+        with self.assertRaises(AlegraResponseParseError) as context:
+            list(self.client.dian.list_stream())
+
+        self.assertEqual(str(context.exception), "boom")
+        self.assertIsInstance(context.exception, ValueError)
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources_non_json.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_list_stream_non_json_response(self):
+        with self.assertRaises(AlegraResponseParseError) as list_context:
+            self.client.dian.list()
+        with self.assertRaises(AlegraResponseParseError) as context:
+            list(self.client.dian.list_stream())
+
+        self.assertEqual(str(context.exception), str(list_context.exception))
+        self.assertEqual(
+            context.exception.response_text, "<html><body>Bad gateway</body></html>"
+        )
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources_array.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_list_stream_array_response(self):
+        with self.assertRaises(AlegraResponseParseError) as list_context:
+            self.client.dian.list()
+        with self.assertRaises(AlegraResponseParseError) as context:
+            list(self.client.dian.list_stream())
+
+        self.assertEqual(str(context.exception), str(list_context.exception))
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources_truncated.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_list_stream_truncated_response(self):
+        with self.assertRaises(AlegraResponseParseError):
+            list(self.client.dian.list_stream())
+
+
+class TestAsyncApiClientList(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.config = ApiConfig(api_key="REDACTED", environment="sandbox")
+        self.client = AsyncApiClient(self.config)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources.yaml",
+        filter_headers=["authorization"],
+    )
+    async def test_list_dian_resources(self):
+        resources = await self.client.dian.list()
+
+        self.assertEqual(len(resources), 2)
+        self.assertEqual(resources[0].name, "Habilitación")
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources.yaml",
+        filter_headers=["authorization"],
+    )
+    async def test_list_stream_dian_resources(self):
+        resources = [resource async for resource in self.client.dian.list_stream()]
+
+        self.assertEqual(
+            [resource.name for resource in resources], ["Habilitación", "Producción"]
+        )
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources_missing_key.yaml",
+        filter_headers=["authorization"],
+    )
+    async def test_list_stream_missing_response_key(self):
+        with self.assertRaises(AlegraResponseParseError) as context:
+            [resource async for resource in self.client.dian.list_stream()]
+
+        self.assertEqual(str(context.exception), "boom")
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_list_dian_resources_non_json.yaml",
+        filter_headers=["authorization"],
+    )
+    async def test_list_stream_non_json_response(self):
+        with self.assertRaises(AlegraResponseParseError) as context:
+            [resource async for resource in self.client.dian.list_stream()]
+
+        self.assertEqual(
+            context.exception.response_text, "<html><body>Bad gateway</body></html>"
+        )
+
+
+class TestAsyncApiClientStreamConcurrency(IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.config = ApiConfig(
+            api_key="REDACTED", environment="sandbox", max_concurrency=1
+        )
+        self.client = AsyncApiClient(self.config)
+        await self.client._async_client.aclose()
+        self.client._async_client = httpx.AsyncClient(
+            base_url=self.client.base_url,
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(
+                    200, json={"dian": [{"id": "1", "name": "Habilitación"}]}
+                )
+            ),
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_request_while_streaming(self):
+        async def stream_and_list():
+            async for resource in self.client.dian.list_stream():
+                return await self.client.dian.list()
+
+        resources = await asyncio.wait_for(stream_and_list(), timeout=1)
+
+        self.assertEqual(resources[0].id, "1")
+
+    async def test_request_after_abandoned_stream(self):
+        stream = self.client.dian.list_stream()
+        async for resource in stream:
+            break
+
+        resources = await asyncio.wait_for(self.client.dian.list(), timeout=1)
+        await stream.aclose()
+
+        self.assertEqual(resources[0].id, "1")
+
+
+class TestApiClientCache(VCRTestCase):
+    def setUp(self):
+        self.config = ApiConfig(api_key="REDACTED", environment="sandbox", cache_size=8)
+        self.client = ApiClient(self.config)
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_company_not_modified.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_company_not_modified(self):
+        company = self.client.companies.get("01JMZ1SM8JDHAPF4VSFC595WAK")
+        cached_company = self.client.companies.get("01JMZ1SM8JDHAPF4VSFC595WAK")
+
+        self.assertEqual(cached_company, company)
+        self.assertIsNot(cached_company, company)
+        self.assertEqual(cached_company.name, "Soluciones Alegra S.A.S")
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_payroll_not_modified.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_payroll_not_modified_isolated_from_edits(self):
+        payroll = self.client.payrolls.get("01JMZ2A7Q4W6N8C3T5X9PB1KDR")
+        payroll.governmentData["employee"]["salary"] = 99
+        cached_payroll = self.client.payrolls.get("01JMZ2A7Q4W6N8C3T5X9PB1KDR")
+
+        self.assertEqual(cached_payroll.governmentData["employee"]["salary"], 1300000)
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_company_unexpected_not_modified.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_company_unexpected_not_modified(self):
+        with self.assertRaises(AlegraHttpError) as context:
+            self.client.companies.get("01JMZ1SM8JDHAPF4VSFC595WAK")
+
+        self.assertEqual(context.exception.status_code, 304)
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_company_unexpected_not_modified.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_company_unexpected_not_modified_without_cache(self):
+        client = ApiClient(
+            ApiConfig(api_key="REDACTED", environment="sandbox", cache_size=0)
+        )
+
+        with self.assertRaises(AlegraHttpError) as context:
+            client.companies.get("01JMZ1SM8JDHAPF4VSFC595WAK")
+
+        self.assertEqual(context.exception.status_code, 304)
+
+
+class TestApiClientErrors(VCRTestCase):
+    def setUp(self):
+        self.config = ApiConfig(api_key="REDACTED", environment="sandbox")
+        self.client = ApiClient(self.config)
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_company_not_found.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_company_not_found(self):
+        with self.assertRaises(AlegraNotFoundError) as context:
+            self.client.companies.get("01JMZ1SM8JDHAPF4VSFC595XXX")
+
+        self.assertEqual(context.exception.status_code, 404)
+        self.assertIsInstance(context.exception, ValueError)
+        self.assertEqual(context.exception.response, {"message": "Company not found"})
+        self.assertIn("Company not found", str(context.exception))
+        self.assertEqual(
+            context.exception.response_text, '{"message":"Company not found"}'
+        )
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_company_non_json.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_company_non_json_response(self):
+        with self.assertRaises(AlegraResponseParseError) as context:
+            self.client.companies.get("01JMZ1SM8JDHAPF4VSFC595WAK")
+
+        self.assertEqual(
+            context.exception.response_text,
+            "<html><body>Service temporarily unavailable</body></html>",
+        )
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_company_body_key.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_company_json_body_key(self):
+        with self.assertRaises(AlegraResponseParseError) as context:
+            self.client.companies.get("01JMZ1SM8JDHAPF4VSFC595WAK")
+
+        self.assertEqual(
+            str(context.exception), "Response key 'company' not found in response"
+        )
+
+    @vcr.use_cassette(
+        "tests/fixtures/vcr_cassettes/test_get_company_not_found.yaml",
+        filter_headers=["authorization"],
+    )
+    def test_get_or_none_company_not_found(self):
+        company = self.client.companies.get_or_none("01JMZ1SM8JDHAPF4VSFC595XXX")
+
+        self.assertIsNone(company)
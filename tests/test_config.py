@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from pydantic import ValidationError
+
+from alegra.config import ApiConfig
+
+
+class TestApiConfig(TestCase):
+    def test_base_url_for_environment(self):
+        config = ApiConfig(api_key="REDACTED", environment="production")
+
+        self.assertEqual(
+            config.get_base_url(), "https://api.alegra.com/e-provider/col/v1"
+        )
+
+    def test_api_key_is_stripped(self):
+        config = ApiConfig(api_key="  REDACTED \n", environment="sandbox")
+
+        self.assertEqual(config.api_key, "REDACTED")
+
+    def test_blank_api_key_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            ApiConfig(api_key="   ", environment="sandbox")
+
+    def test_invalid_environment_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            ApiConfig(api_key="REDACTED", environment="staging")
+
+    def test_non_positive_max_concurrency_is_rejected(self):
+        for max_concurrency in (0, -1):
+            with self.assertRaises(ValidationError):
+                ApiConfig(
+                    api_key="REDACTED",
+                    environment="sandbox",
+                    max_concurrency=max_concurrency,
+                )
+
+    def test_negative_cache_size_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            ApiConfig(api_key="REDACTED", environment="sandbox", cache_size=-1)
+
+    def test_config_is_frozen(self):
+        config = ApiConfig(api_key="REDACTED", environment="sandbox")
+
+        with self.assertRaises(ValidationError):
+            config.environment = "production"